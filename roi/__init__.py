@@ -1,3 +1,6 @@
 from .image import Image
 from .roi import (ROI, RectROI, CylROI, SphereROI)
 from .io import (json_to_roi,)
+from .cache import (DiskResultCache,)
+from .tracker import (ConvergenceTracker,)
+from . import pipeline
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+import hashlib
+import os
+import re
+import tempfile
+import numpy as np
+
+# Names of the files results are stored in, see DiskResultCache._filename().
+_result_name = re.compile(r'^[0-9a-f]{40}\.npy$')
+
+class DiskResultCache:
+    '''
+    A result cache for ROI.set_result_cache() that stores each result as a
+    .npy file in a local directory, so that cached results persist between
+    runs.  A plain dict can be used instead for an in-memory cache.
+    '''
+    def __init__(self, path):
+        '''
+        Creates the cache, making the directory if it does not exist.
+
+        Parameters
+        ----------
+        path : str
+            The directory the results are stored in.
+        '''
+        self.path = path
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+    def _filename(self, key):
+        '''
+        Maps a key to the file its result is stored in, using a hash of the
+        key's repr.
+        '''
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest + '.npy')
+
+    def __contains__(self, key):
+        return os.path.isfile(self._filename(key))
+
+    def __getitem__(self, key):
+        try:
+            return np.load(self._filename(key))[()]
+        except IOError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        # Write to a temporary file first so that a partially written result
+        # is never read by another process sharing the directory.
+        fid, tmp = tempfile.mkstemp(suffix='.npy', dir=self.path)
+        with os.fdopen(fid, 'wb') as f:
+            np.save(f, np.asarray(value))
+        os.replace(tmp, self._filename(key))
+
+    def clear(self):
+        '''
+        Removes all of the stored results.  Other files in the directory are
+        left alone.
+        '''
+        for name in os.listdir(self.path):
+            if _result_name.match(name):
+                os.remove(os.path.join(self.path, name))
@@ -1,6 +1,11 @@
 #!/usr/bin/env python
 
+import hashlib
 import numpy as np
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 class Image:
     '''
@@ -37,6 +42,28 @@ class Image:
         '''
         return (tuple(self.fov), tuple(self.vsize), tuple(self.center))
 
+    def get_data_hash(self):
+        '''
+        Returns a hash of the image's voxel values so that results calculated
+        on the image can be cached.  This uses xxhash if it is installed and
+        falls back to hashlib's blake2b otherwise.  The hash is computed once
+        and reused until set_data is called, so modifying self.data in place
+        will not be detected.
+
+        Returns
+        -------
+        res : str
+            A hex digest of the voxel values
+        '''
+        if self._data_hash is None:
+            buf = np.ascontiguousarray(self.data).view(np.uint8)
+            if xxhash is not None:
+                self._data_hash = xxhash.xxh64(buf).hexdigest()
+            else:
+                self._data_hash = hashlib.blake2b(
+                    buf, digest_size=16).hexdigest()
+        return self._data_hash
+
     def set_data(self, data):
         '''
         Used by init to set the voxel values of the image.  This can also be
@@ -55,6 +82,7 @@ class Image:
         if data.ndim != 3:
             raise ValueError('Only 3 dimensional images are supported')
         self.data = data
+        self._data_hash = None
         self.vsize = np.array(data.shape)
         self.init_grid()
 
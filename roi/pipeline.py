@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+import queue
+import threading
+import numpy as np
+from .image import Image
+
+# The scalar ROI statistics that can be requested from run().
+stat_names = ('max', 'min', 'median', 'mean', 'var', 'std', 'sum',
+              'int_uniformity')
+
+# Marker placed on the queue by the loader thread once all paths are loaded.
+_DONE = object()
+
+def _load_image(path, fov, center, loader):
+    '''
+    Loads a single path with loader and wraps the result in an Image, unless
+    the loader already returned one.
+    '''
+    data = loader(path)
+    if isinstance(data, Image):
+        return data
+    return Image(fov, data, center)
+
+def _prefetch(paths, fov, center, loader, buf, stop):
+    '''
+    Body of the background loader thread.  Loads each path in order and places
+    (index, image) on buf.  Any exception raised while loading, including
+    SystemExit and KeyboardInterrupt, is placed on buf instead so that it can
+    be re-raised by the consumer.  Blocks while buf
+    is full, checking stop periodically so the thread can exit if the consumer
+    gives up early.
+    '''
+    def put(item):
+        while not stop.is_set():
+            try:
+                buf.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    for idx, path in enumerate(paths):
+        try:
+            item = (idx, _load_image(path, fov, center, loader))
+        except BaseException as e:
+            put(e)
+            return
+        if not put(item):
+            return
+    put(_DONE)
+
+def iter_images(paths, fov, center=(0,0,0), loader=np.load, prefetch=2):
+    '''
+    Yields an Image for each path in order, loading up to prefetch images
+    ahead in a background thread so that I/O overlaps with whatever the caller
+    does with the current image.
+
+    Parameters
+    ----------
+    paths : sequence
+        The files to load, passed one at a time to loader.
+    fov : array_like, shape = (3,)
+        The FOV size used to construct each Image.
+    center : array_like, shape = (3,)
+        The FOV center used to construct each Image.
+    loader : callable
+        Called as loader(path).  Should return either the voxel data as an
+        array_like, shape = (n,m,o), or a roi.Image, in which case fov and
+        center are ignored.  Defaults to numpy.load.
+    prefetch : int
+        The maximum number of loaded images queued waiting to be processed.
+        Up to prefetch + 2 images are held in memory at once, counting the one
+        being loaded and the one being processed.  Each Image also stores the
+        X, Y, and Z meshgrids, so takes about 4 times the size of its data.
+        0 loads each image in the calling thread with no overlap.
+
+    Yields
+    ------
+    img : roi.Image
+        The image for each path, in the order given.
+    '''
+    prefetch = int(prefetch)
+    if prefetch < 0:
+        raise ValueError('Negative prefetch provided')
+    if prefetch == 0:
+        for path in paths:
+            yield _load_image(path, fov, center, loader)
+        return
+
+    buf = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    thread = threading.Thread(target=_prefetch, name='roi-prefetch',
+                              args=(paths, fov, center, loader, buf, stop))
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            try:
+                item = buf.get(timeout=0.1)
+            except queue.Empty:
+                if thread.is_alive():
+                    continue
+                # The thread may have put its last item just before exiting.
+                try:
+                    item = buf.get_nowait()
+                except queue.Empty:
+                    raise RuntimeError('Image loader thread exited early')
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item[1]
+    finally:
+        stop.set()
+        thread.join()
+
+def run(paths, rois, stats, fov, center=(0,0,0), loader=np.load, prefetch=2):
+    '''
+    Calculates the requested statistics for every ROI on every image in paths.
+    Upcoming images are loaded in a background thread while the current one
+    is processed, see iter_images().
+
+    Parameters
+    ----------
+    paths : sequence
+        The files to load, passed one at a time to loader.
+    rois : sequence of roi.ROI
+        The ROIs to calculate the statistics of.
+    stats : sequence of str
+        Names of the ROI statistics to calculate, such as 'mean' or 'std'.
+    fov : array_like, shape = (3,)
+        The FOV size used to construct each Image.
+    center : array_like, shape = (3,)
+        The FOV center used to construct each Image.
+    loader : callable
+        Called as loader(path).  Should return either the voxel data or a
+        roi.Image.  Defaults to numpy.load.
+    prefetch : int
+        The maximum number of loaded images queued waiting to be processed,
+        see iter_images() for the memory used.  0 disables background loading.
+
+    Returns
+    -------
+    res : numpy.ndarray, shape = (len(paths), len(rois), len(stats))
+        The value of each statistic for each ROI on each image.
+    '''
+    paths = list(paths)
+    rois = list(rois)
+    stats = list(stats)
+    for stat in stats:
+        if stat not in stat_names:
+            raise ValueError('ROI statistic, "%s" not recognized' % stat)
+
+    res = np.empty((len(paths), len(rois), len(stats)))
+    images = iter_images(paths, fov, center, loader, prefetch)
+    for ii, img in enumerate(images):
+        for jj, r in enumerate(rois):
+            for kk, stat in enumerate(stats):
+                res[ii, jj, kk] = getattr(r, stat)(img)
+    return res
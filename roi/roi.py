@@ -3,12 +3,87 @@
 import numpy as np
 from .image import Image
 
+def _builtin_key(key):
+    '''
+    Converts a tuple of array_like entries, such as from Image.get_key(), into
+    nested tuples of builtin python types so the key's repr does not depend on
+    the numpy version.
+    '''
+    return tuple(tuple(np.asarray(k).tolist()) for k in key)
+
+def _defining_class(cls, name):
+    '''
+    Returns the class in the mro of cls that defines the attribute name.
+    '''
+    for base in cls.__mro__:
+        if name in vars(base):
+            return base
+
 class ROI:
     '''
     Base ROI class
     '''
     def __init__(self):
         self._clear_cache()
+        self.set_result_cache(None)
+
+    def get_key(self):
+        '''
+        Returns a key that uniquely identifies the definition of the ROI so
+        that results calculated with it can be cached.  The class of the ROI
+        is always added to the key by the cache, so this only needs to
+        identify the ROI among instances of the same class.  This function
+        should be overridden by subclasses with more specific properties.
+        Results of subclasses that override _get_mask but not get_key are not
+        cached.
+
+        Returns
+        -------
+        res : tuple
+            A tuple uniquely identifying the ROI
+        '''
+        return ('roi',)
+
+    def set_result_cache(self, cache):
+        '''
+        Sets a cache for the results of the ROI statistics.  Results are keyed
+        by the statistic, ROI.get_key(), Image.get_key(), and
+        Image.get_data_hash(), so repeated calls on an unchanged image are
+        served without touching the voxel data again.  The cache can be shared
+        between ROIs.  Subclasses must override get_key() to be cached.
+
+        Parameters
+        ----------
+        cache : dict like or None
+            Any object supporting `in`, [] and []= with tuple keys, such as a
+            dict or a roi.DiskResultCache.  None disables caching, which is the
+            default.
+        '''
+        self.result_cache = cache
+
+    def _cached(self, stat, image, func):
+        '''
+        Returns func() for the given statistic on the image, looking it up in
+        the result_cache first if one has been set.
+        '''
+        if self.result_cache is None:
+            return func()
+        cls = type(self)
+        # A get_key() inherited from a class with a different _get_mask has no
+        # way of describing this ROI's mask, so its results aren't cached.
+        mask_cls = _defining_class(cls, '_get_mask')
+        key_cls = _defining_class(cls, 'get_key')
+        if mask_cls is not key_cls and issubclass(mask_cls, key_cls):
+            return func()
+        key = (stat, (cls.__module__, cls.__qualname__), self.get_key(),
+               _builtin_key(image.get_key()), image.get_data_hash())
+        try:
+            return self.result_cache[key]
+        except KeyError:
+            pass
+        value = func()
+        self.result_cache[key] = value
+        return value
 
     def get_mask(self, image):
         '''
@@ -80,7 +155,8 @@ class ROI:
         res : numpy.scalar
             A numpy scalar indicating the statistic requested
         '''
-        return image.data[self.get_mask(image) > 0].max()
+        return self._cached('max', image, lambda:
+                            image.data[self.get_mask(image) > 0].max())
 
     def min(self, image):
         '''
@@ -97,7 +173,8 @@ class ROI:
         res : numpy.scalar
             A numpy scalar indicating the statistic requested
         '''
-        return image.data[self.get_mask(image) > 0].min()
+        return self._cached('min', image, lambda:
+                            image.data[self.get_mask(image) > 0].min())
 
     def median(self, image):
         '''
@@ -114,7 +191,8 @@ class ROI:
         res : numpy.scalar
             A numpy scalar indicating the statistic requested
         '''
-        return np.median(image.data[self.get_mask(image) > 0])
+        return self._cached('median', image, lambda:
+                            np.median(image.data[self.get_mask(image) > 0]))
 
     def mean(self, image):
         '''
@@ -131,7 +209,9 @@ class ROI:
         res : numpy.scalar
             A numpy scalar indicating the statistic requested
         '''
-        return np.average(image.data, weights=self.get_mask(image))
+        return self._cached('mean', image, lambda:
+                            np.average(image.data,
+                                       weights=self.get_mask(image)))
 
     def var(self, image):
         '''
@@ -148,8 +228,9 @@ class ROI:
         res : numpy.scalar
             A numpy scalar indicating the statistic requested
         '''
-        return np.average((image.data - self.mean(image)) ** 2,
-                         weights=self.get_mask(image))
+        return self._cached('var', image, lambda:
+                            np.average((image.data - self.mean(image)) ** 2,
+                                       weights=self.get_mask(image)))
 
     def std(self, image):
         '''
@@ -181,7 +262,8 @@ class ROI:
         res : numpy.scalar
             A numpy scalar indicating the statistic requested
         '''
-        return (image.data * self.get_mask(image)).sum()
+        return self._cached('sum', image, lambda:
+                            (image.data * self.get_mask(image)).sum())
 
     def int_uniformity(self, image):
         '''
@@ -278,6 +360,13 @@ class RectROI(ROI):
             raise ValueError('Shape of ROI center provided not (3,)')
         self._clear_cache()
 
+    def get_key(self):
+        '''
+        Returns a key uniquely identifying the ROI from the size and center.
+        '''
+        return ('rectangle', tuple(self.size.tolist()),
+                tuple(self.center.tolist()))
+
     def _get_mask(self, image):
         '''
         Creates a mask for the given image. Voxels with a center less than
@@ -386,6 +475,14 @@ class CylROI(ROI):
             raise ValueError('Shape of ROI center provided not (3,)')
         self._clear_cache()
 
+    def get_key(self):
+        '''
+        Returns a key uniquely identifying the ROI from the radius, height, and
+        center.
+        '''
+        return ('cylinder', float(self.radius), float(self.height),
+                tuple(self.center.tolist()))
+
     def _get_mask(self, image):
         '''
         Creates a mask for the given image. Voxels with a center less than
@@ -477,6 +574,12 @@ class SphereROI(ROI):
             raise ValueError('Shape of ROI center provided not (3,)')
         self._clear_cache()
 
+    def get_key(self):
+        '''
+        Returns a key uniquely identifying the ROI from the radius and center.
+        '''
+        return ('sphere', float(self.radius), tuple(self.center.tolist()))
+
     def _get_mask(self, image):
         '''
         Creates a mask for the given image. Voxels with a center less than
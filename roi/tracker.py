@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+
+import numpy as np
+from .image import Image
+
+class ConvergenceTracker:
+    '''
+    Tracks ROI statistics over a series of frames on the same image grid, such
+    as the iterations of a reconstruction, and signals once they have stopped
+    changing.
+    '''
+    stat_names = ('mean', 'var', 'std', 'contrast')
+
+    def __init__(self, image, rois, background=None, tol=1e-3,
+                 track=('mean', 'std')):
+        '''
+        Compiles the ROIs against the grid of image.  The masks are calculated
+        once, and the voxels covered by any ROI are gathered from each frame
+        with a single indexing operation.
+
+        Parameters
+        ----------
+        image : roi.Image
+            An image defining the grid that all frames share.  The data of the
+            image is not used.
+        rois : sequence of roi.ROI
+            The ROIs to track.
+        background : roi.ROI
+            The ROI used as the background when calculating the contrast of
+            each ROI, mean / background mean - 1.  Required to track
+            'contrast'.  update() raises a ValueError for a frame where the
+            background mean is zero.
+        tol : numpy.scalar like
+            Convergence is signaled once the relative change from the previous
+            frame of every tracked statistic, for every ROI, is at most tol.
+        track : sequence of str
+            The statistics considered for convergence, from 'mean', 'var',
+            'std', and 'contrast'.
+        '''
+        if not isinstance(image, Image):
+            raise TypeError('image is not an Image class')
+        self.grid_key = image.get_key()
+        self.vsize = tuple(image.vsize)
+        self.rois = list(rois)
+        if not self.rois:
+            raise ValueError('No ROIs provided to track')
+        self.background = background
+        self.tol = np.float64(tol)
+        if self.tol < 0:
+            raise ValueError('Negative tolerance provided')
+        self.track = tuple(track)
+        if not self.track:
+            raise ValueError('No statistics provided to track')
+        for stat in self.track:
+            self._check_stat(stat)
+        if 'contrast' in self.track and self.background is None:
+            raise ValueError('Tracking contrast requires a background ROI')
+
+        masks = [r.get_mask(image).ravel() for r in self.rois]
+        if self.background is not None:
+            masks.append(self.background.get_mask(image).ravel())
+        # Flat indices of every voxel used by any ROI, then for each ROI the
+        # positions within that gathered subset and their weights.
+        self.index = np.flatnonzero(np.any([m > 0 for m in masks], axis=0))
+        self._pos = []
+        self._weights = []
+        for mask in masks:
+            sub = mask[self.index]
+            pos = np.flatnonzero(sub > 0)
+            self._pos.append(pos)
+            self._weights.append(sub[pos])
+            if self._weights[-1].sum() == 0:
+                raise ValueError('ROI does not cover any voxels of the image')
+        self.reset()
+
+    def _check_stat(self, stat):
+        '''
+        Raises a ValueError if stat is not one of self.stat_names.
+        '''
+        if stat not in self.stat_names:
+            raise ValueError('Statistic, "%s" not recognized' % stat)
+
+    def reset(self):
+        '''
+        Clears all of the frames seen so far.
+        '''
+        self.series = dict((stat, []) for stat in self.stat_names)
+        self.deltas = dict((stat, []) for stat in self.stat_names)
+        # Welford accumulators of each statistic over the frames, used for the
+        # running mean and standard deviation of the statistic for each ROI.
+        self._running_mean = dict((stat, 0.0) for stat in self.stat_names)
+        self._running_m2 = dict((stat, 0.0) for stat in self.stat_names)
+        self.converged = False
+
+    def __len__(self):
+        '''
+        The number of frames seen so far.
+        '''
+        return len(self.series['mean'])
+
+    def _gather(self, frame):
+        '''
+        Returns the voxels of frame covered by any ROI as a 1d array.
+        '''
+        if isinstance(frame, Image):
+            if frame.get_key() != self.grid_key:
+                raise ValueError('Frame grid does not match tracker grid')
+            data = frame.data
+        else:
+            data = np.asarray(frame, dtype=float)
+            if data.shape != self.vsize:
+                raise ValueError('Frame shape does not match tracker grid')
+        return data.ravel()[self.index]
+
+    def update(self, frame):
+        '''
+        Calculates the statistics of each ROI on the next frame, appending
+        them, and their relative change from the previous frame, to the series.
+
+        Parameters
+        ----------
+        frame : roi.Image or array_like, shape = (n,m,o)
+            The next frame.  An Image must have the same grid as the tracker,
+            and raw data must have the same shape.
+
+        Returns
+        -------
+        res : bool
+            True if the tracked statistics have converged
+        '''
+        values = self._gather(frame)
+        means = []
+        variances = []
+        for pos, weights in zip(self._pos, self._weights):
+            vals = values[pos]
+            mean = np.average(vals, weights=weights)
+            means.append(mean)
+            variances.append(np.average((vals - mean) ** 2, weights=weights))
+        means = np.array(means)
+        variances = np.array(variances)
+
+        n = len(self.rois)
+        current = {
+            'mean': means[:n],
+            'var': variances[:n],
+            'std': np.sqrt(variances[:n]),
+            'contrast': np.full(n, np.nan),
+        }
+        if self.background is not None:
+            if means[n] == 0:
+                raise ValueError('Background mean is zero, contrast undefined')
+            current['contrast'] = means[:n] / means[n] - 1
+
+        for stat in self.stat_names:
+            if self.series[stat]:
+                prev = self.series[stat][-1]
+                denom = np.where(prev == 0, 1.0, np.abs(prev))
+                self.deltas[stat].append(np.abs(current[stat] - prev) / denom)
+            self.series[stat].append(current[stat])
+            delta = current[stat] - self._running_mean[stat]
+            self._running_mean[stat] = (self._running_mean[stat] +
+                                        delta / len(self.series[stat]))
+            self._running_m2[stat] = (self._running_m2[stat] + delta *
+                                      (current[stat] -
+                                       self._running_mean[stat]))
+
+        self.converged = len(self) > 1 and all(
+            (self.deltas[stat][-1] <= self.tol).all() for stat in self.track)
+        return self.converged
+
+    def get_series(self, stat):
+        '''
+        Returns the value of a statistic for each ROI over all frames.
+
+        Parameters
+        ----------
+        stat : str
+            One of 'mean', 'var', 'std', or 'contrast'.
+
+        Returns
+        -------
+        res : numpy.ndarray, shape = (len(self), len(self.rois))
+            The statistic for each frame and ROI
+        '''
+        self._check_stat(stat)
+        return np.array(self.series[stat]).reshape(-1, len(self.rois))
+
+    def get_deltas(self, stat):
+        '''
+        Returns the relative change of a statistic for each ROI from one frame
+        to the next.
+
+        Parameters
+        ----------
+        stat : str
+            One of 'mean', 'var', 'std', or 'contrast'.
+
+        Returns
+        -------
+        res : numpy.ndarray, shape = (len(self) - 1, len(self.rois))
+            The relative change for each frame after the first and ROI
+        '''
+        self._check_stat(stat)
+        return np.array(self.deltas[stat]).reshape(-1, len(self.rois))
+
+    def get_running(self, stat):
+        '''
+        Returns the running mean and standard deviation of a statistic for
+        each ROI over all frames seen so far, updated incrementally with each
+        frame.
+
+        Parameters
+        ----------
+        stat : str
+            One of 'mean', 'var', 'std', or 'contrast'.
+
+        Returns
+        -------
+        mean : numpy.ndarray, shape = (len(self.rois),)
+            The mean of the statistic over the frames for each ROI
+        std : numpy.ndarray, shape = (len(self.rois),)
+            The standard deviation of the statistic over the frames for each
+            ROI
+        '''
+        self._check_stat(stat)
+        if len(self) == 0:
+            raise ValueError('No frames have been provided')
+        return (self._running_mean[stat],
+                np.sqrt(self._running_m2[stat] / len(self)))
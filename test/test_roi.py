@@ -1,4 +1,6 @@
 import roi
+import threading
+import time
 import numpy as np
 
 def test_io_cyl():
@@ -42,3 +44,226 @@ def test_cylinder():
     assert(cyl_roi.sum(img) == 8.)
     assert(cyl_roi.mean(img) == 1.)
     assert(cyl_roi.std(img) == 0.)
+
+def test_pipeline_run():
+    image_vsize = (32, 16, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    frames = [np.full(image_vsize, float(x)) for x in range(5)]
+    rois = [roi.RectROI((1.0, 1.0, 1.0), (0, 0, 0)),
+            roi.SphereROI(0.434, (0, 0, 0))]
+    for prefetch in (0, 2):
+        res = roi.pipeline.run(range(5), rois, ('sum', 'mean'), image_fov,
+                               loader=lambda idx: frames[idx],
+                               prefetch=prefetch)
+        assert(res.shape == (5, 2, 2))
+        for ii in range(5):
+            assert((res[ii, :, 0] == 8. * ii).all())
+            assert((res[ii, :, 1] == ii).all())
+
+def test_pipeline_loader_error():
+    def loader(path):
+        raise IOError('missing ' + path)
+    try:
+        roi.pipeline.run(['a.npy'], [roi.ROI()], ('sum',), (1, 1, 1),
+                         loader=loader)
+    except IOError:
+        pass
+    else:
+        assert(False)
+
+def test_result_cache():
+    cache = dict()
+    rect_roi = roi.RectROI((1.0, 1.0, 1.0), (0, 0, 0))
+    rect_roi.set_result_cache(cache)
+    image_vsize = (32, 16, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    img = roi.Image(image_fov, np.ones(image_vsize))
+    assert(rect_roi.sum(img) == 8.)
+    assert(len(cache) == 1)
+    assert(rect_roi.sum(img) == 8.)
+    assert(len(cache) == 1)
+    img.set_data(2 * np.ones(image_vsize))
+    assert(rect_roi.sum(img) == 16.)
+    assert(len(cache) == 2)
+    rect_roi.set_size((0.4, 0.4, 0.4))
+    assert(rect_roi.sum(img) == 0.)
+    assert(len(cache) == 3)
+
+def test_disk_result_cache(tmpdir):
+    sph_roi = roi.SphereROI(0.434, (0, 0, 0))
+    sph_roi.set_result_cache(roi.DiskResultCache(str(tmpdir)))
+    image_vsize = (32, 16, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    img = roi.Image(image_fov, np.ones(image_vsize))
+    assert(sph_roi.std(img) == 0.)
+    assert(len(tmpdir.listdir()) == 2)
+    other_roi = roi.SphereROI(0.434, (0, 0, 0))
+    other_roi.set_result_cache(roi.DiskResultCache(str(tmpdir)))
+    assert(other_roi.mean(img) == 1.)
+    assert(len(tmpdir.listdir()) == 2)
+
+def test_convergence_tracker():
+    image_vsize = (32, 16, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    img = roi.Image(image_fov, np.ones(image_vsize))
+    sph_roi = roi.SphereROI(0.434, (0, 0, 0))
+    bkg_roi = roi.RectROI((4.0, 4.0, 1.0), (4, 4, 0))
+    tracker = roi.ConvergenceTracker(img, [sph_roi], background=bkg_roi,
+                                     tol=1e-2, track=('mean', 'contrast'))
+    converged = []
+    for ii in range(1, 8):
+        data = np.ones(image_vsize)
+        data[sph_roi.get_mask(img) > 0] = 2.0 - 0.5 ** ii
+        img.set_data(data)
+        converged.append(tracker.update(img))
+        assert(np.isclose(tracker.get_series('mean')[-1, 0],
+                          sph_roi.mean(img)))
+        assert(np.isclose(tracker.get_series('std')[-1, 0],
+                          sph_roi.std(img)))
+    assert(converged == [False] * 6 + [True])
+    assert(tracker.get_series('contrast').shape == (7, 1))
+    assert(tracker.get_deltas('mean').shape == (6, 1))
+    assert(np.isclose(tracker.get_series('contrast')[-1, 0], 1.0 - 0.5 ** 7))
+
+def test_pipeline_early_stop():
+    image_vsize = (32, 16, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    images = roi.pipeline.iter_images(range(10), image_fov,
+                                      loader=lambda idx: np.ones(image_vsize),
+                                      prefetch=2)
+    for ii, img in enumerate(images):
+        if ii == 1:
+            break
+    images.close()
+    assert(not [t for t in threading.enumerate() if t.name == 'roi-prefetch'])
+
+def test_pipeline_bad_stat():
+    try:
+        roi.pipeline.run(['a.npy'], [roi.ROI()], ('get_mask',), (1, 1, 1))
+    except ValueError:
+        pass
+    else:
+        assert(False)
+
+def test_result_cache_custom_roi():
+    class LowerROI(roi.ROI):
+        def _get_mask(self, image):
+            return (image.Z < 0).astype(float)
+
+    class UpperROI(roi.ROI):
+        def _get_mask(self, image):
+            return (image.Z > 0).astype(float)
+
+    cache = dict()
+    lower_roi = LowerROI()
+    upper_roi = UpperROI()
+    lower_roi.set_result_cache(cache)
+    upper_roi.set_result_cache(cache)
+    image_vsize = (4, 4, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    data = np.ones(image_vsize)
+    data[:, :, 3:] = 2.
+    img = roi.Image(image_fov, data)
+    assert(lower_roi.mean(img) == 1.)
+    assert(upper_roi.mean(img) == 2.)
+
+def test_convergence_tracker_running():
+    image_vsize = (32, 16, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    img = roi.Image(image_fov, np.ones(image_vsize))
+    sph_roi = roi.SphereROI(0.434, (0, 0, 0))
+    tracker = roi.ConvergenceTracker(img, [sph_roi])
+    for ii in range(5):
+        tracker.update(float(ii) * np.ones(image_vsize))
+    mean, std = tracker.get_running('mean')
+    assert(np.isclose(mean[0], 2.))
+    assert(np.isclose(std[0], np.std(np.arange(5.))))
+
+def test_convergence_tracker_invalid():
+    image_vsize = (32, 16, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    img = roi.Image(image_fov, np.ones(image_vsize))
+    sph_roi = roi.SphereROI(0.434, (0, 0, 0))
+    outside_roi = roi.SphereROI(1, (100, 0, 0))
+    for rois, track in (([outside_roi], ('mean',)), ([sph_roi], ()),
+                        ([], ('mean',))):
+        try:
+            roi.ConvergenceTracker(img, rois, track=track)
+        except ValueError:
+            pass
+        else:
+            assert(False)
+    tracker = roi.ConvergenceTracker(img, [sph_roi])
+    tracker.update(img)
+    try:
+        tracker.get_series('median')
+    except ValueError:
+        pass
+    else:
+        assert(False)
+    bkg_roi = roi.RectROI((4.0, 4.0, 1.0), (4, 4, 0))
+    tracker = roi.ConvergenceTracker(img, [sph_roi], background=bkg_roi,
+                                     track=('contrast',))
+    try:
+        tracker.update(np.zeros(image_vsize))
+    except ValueError:
+        pass
+    else:
+        assert(False)
+    assert(len(tracker) == 0)
+
+def test_pipeline_prefetch_bound():
+    image_vsize = (32, 16, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    prefetch = 2
+    # Number of images the consumer has finished with, and for each load how
+    # many images are loaded ahead of the one the consumer is processing.
+    released = [0]
+    ahead = []
+    def loader(idx):
+        ahead.append(idx - released[0])
+        return np.ones(image_vsize)
+    images = roi.pipeline.iter_images(range(10), image_fov, loader=loader,
+                                      prefetch=prefetch)
+    for img in images:
+        time.sleep(0.02)
+        released[0] += 1
+    assert(released[0] == 10)
+    assert(max(ahead) == prefetch + 1)
+
+def test_pipeline_loader_exit():
+    def loader(path):
+        raise SystemExit(1)
+    try:
+        roi.pipeline.run(['a.npy'], [roi.ROI()], ('sum',), (1, 1, 1),
+                         loader=loader)
+    except SystemExit:
+        pass
+    else:
+        assert(False)
+
+def test_result_cache_derived_roi():
+    class HollowSphereROI(roi.SphereROI):
+        def _get_mask(self, image):
+            return 1.0 - roi.SphereROI._get_mask(self, image)
+
+    cache = dict()
+    sph_roi = roi.SphereROI(0.434, (0, 0, 0))
+    hollow_roi = HollowSphereROI(0.434, (0, 0, 0))
+    sph_roi.set_result_cache(cache)
+    hollow_roi.set_result_cache(cache)
+    image_vsize = (4, 4, 6)
+    image_fov = [x / 2.0 for x in image_vsize]
+    img = roi.Image(image_fov, np.ones(image_vsize))
+    img.set_data(1.0 + 4.0 * sph_roi.get_mask(img))
+    assert(sph_roi.mean(img) == 5.)
+    assert(hollow_roi.mean(img) == 1.)
+    assert(len(cache) == 1)
+
+def test_disk_result_cache_clear(tmpdir):
+    other = tmpdir.join('iter_001.npy')
+    np.save(str(other), np.ones(3))
+    cache = roi.DiskResultCache(str(tmpdir))
+    cache[('mean',)] = 1.
+    cache.clear()
+    assert(tmpdir.listdir() == [other])